@@ -48,7 +48,7 @@ from typing import (
 )
 
 import cocotb
-from cocotb.regression import Test
+from cocotb.regression import Test, _BoundTestFunction
 
 Result = TypeVar("Result")
 
@@ -184,7 +184,7 @@ class _Parameterized(Generic[F]):
 
         # go through the cartesian product of all values of all options
         for selected_options in product(*option_indexes):
-            test_kwargs: Dict[str, Sequence[Any]] = {}
+            test_kwargs: Dict[str, Any] = {}
             test_name_pieces: List[str] = [test_func_name]
             for option_idx, select_idx in enumerate(selected_options):
                 option_name, option_values = self.options[option_idx]
@@ -192,14 +192,12 @@ class _Parameterized(Generic[F]):
 
                 if isinstance(option_name, str):
                     # single params per option
-                    selected_value = cast(Sequence[Any], selected_value)
                     test_kwargs[option_name] = selected_value
                     test_name_pieces.append(
                         f"/{option_name}={self._option_reprs[option_name][select_idx]}"
                     )
                 else:
                     # multiple params per option
-                    selected_value = cast(Sequence[Any], selected_value)
                     for n, v in zip(option_name, selected_value):
                         test_kwargs[n] = v
                         test_name_pieces.append(
@@ -208,13 +206,8 @@ class _Parameterized(Generic[F]):
 
             parametrized_test_name = "".join(test_name_pieces)
 
-            # create wrapper function to bind kwargs
-            @functools.wraps(self.test_function)
-            async def _my_test(dut, kwargs: Dict[str, Any] = test_kwargs) -> None:
-                await self.test_function(dut, **kwargs)
-
             yield Test(
-                func=_my_test,
+                func=_ParameterizedFunction(self.test_function, test_kwargs),
                 name=parametrized_test_name,
                 timeout_time=timeout_time,
                 timeout_unit=timeout_unit,
@@ -226,6 +219,31 @@ class _Parameterized(Generic[F]):
             )
 
 
+class _ParameterizedFunction(_BoundTestFunction):
+    """The test function of a test generated by :func:`parametrize`.
+
+    Binds the selected option values. All the tests share the one wrapper,
+    :func:`_run_parameterized`.
+    """
+
+    __slots__ = ("_kwargs",)
+
+    def __init__(
+        self, func: Callable[..., Coroutine[Any, Any, None]], kwargs: Dict[str, Any]
+    ) -> None:
+        super().__init__(func)
+        self._kwargs = kwargs
+
+    def _run(self, dut: Any) -> Coroutine[Any, Any, None]:
+        return _run_parameterized(self.__wrapped__, dut, self._kwargs)
+
+
+async def _run_parameterized(
+    func: Callable[..., Coroutine[Any, Any, None]], dut: Any, kwargs: Dict[str, Any]
+) -> None:
+    await func(dut, **kwargs)
+
+
 def _reprs(values: Sequence[Any]) -> List[str]:
     result: List[str] = []
     for value in values:
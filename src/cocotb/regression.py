@@ -27,32 +27,37 @@
 
 """All things relating to regression capabilities."""
 
+import abc
 import functools
-import hashlib
 import inspect
 import logging
 import os
-import pdb
 import random
 import re
+import sys
 import time
 import warnings
+import zlib
+from collections import deque
 from enum import auto
 from importlib import import_module
-from itertools import product
+from operator import attrgetter
 from typing import (
     Any,
     Callable,
     Coroutine,
+    Deque,
     Dict,
     Generic,
     List,
+    NamedTuple,
     Optional,
     Sequence,
+    Set,
+    Tuple,
     Type,
     TypeVar,
     Union,
-    cast,
     overload,
 )
 
@@ -79,17 +84,22 @@ _pdb_on_exception = "COCOTB_PDB_ON_EXCEPTION" in os.environ
 
 _logger = logging.getLogger(__name__)
 
-_Failed: Type[BaseException]
-try:
-    import pytest
-except ModuleNotFoundError:
-    _Failed = AssertionError
-else:
+
+@functools.lru_cache(maxsize=None)
+def _get_failed_type() -> Type[BaseException]:
+    """Get the exception type raised by a failing :func:`pytest.raises`.
+
+    Resolved on first use to avoid importing and probing pytest until a test expects a failure.
+    """
+    try:
+        import pytest
+    except ModuleNotFoundError:
+        return AssertionError
     try:
         with pytest.raises(Exception):
             pass
-    except BaseException as _raises_e:
-        _Failed = type(_raises_e)
+    except BaseException as e:
+        return type(e)
     else:
         assert False, "pytest.raises doesn't raise an exception when it fails"
 
@@ -142,6 +152,26 @@ class Test:
             Tests from earlier stages are run before tests from later stages.
     """
 
+    # factories can generate a very large number of tests
+    __slots__ = (
+        "_user_func",
+        "func",
+        "timeout_time",
+        "timeout_unit",
+        "expect_fail",
+        "expect_error",
+        "_expect_sim_failure",
+        "skip",
+        "stage",
+        "name",
+        "module",
+        "_doc",
+        "_doc_resolved",
+        "fullname",
+        "_file",
+        "_lineno",
+    )
+
     def __init__(
         self,
         *,
@@ -157,22 +187,9 @@ class Test:
         stage: int = 0,
         _expect_sim_failure: bool = False,
     ) -> None:
+        self._user_func = func
         if timeout_time is not None:
-            co = func  # must save ref because we overwrite variable "func"
-
-            @functools.wraps(func)
-            async def func(*args, **kwargs):
-                running_co = Task(co(*args, **kwargs))
-
-                try:
-                    res = await cocotb.triggers.with_timeout(
-                        running_co, self.timeout_time, self.timeout_unit
-                    )
-                except SimTimeoutError:
-                    running_co.kill()
-                    raise
-                else:
-                    return res
+            func = _TestTimeoutFunction(func, self)
 
         self.func = func
         self.timeout_time = timeout_time
@@ -186,14 +203,137 @@ class Test:
         self._expect_sim_failure = _expect_sim_failure
         self.skip = skip
         self.stage = stage
-        self.name = self.func.__qualname__ if name is None else name
-        self.module = self.func.__module__ if module is None else module
-        self.doc = self.func.__doc__ if doc is None else doc
-        if self.doc is not None:
-            # cleanup docstring using `trim` function from PEP257
-            self.doc = inspect.cleandoc(self.doc)
+        self.name = self._user_func.__qualname__ if name is None else name
+        self.module = self._user_func.__module__ if module is None else module
+        # resolved on first use, see :attr:`doc`
+        self._doc = doc
+        self._doc_resolved = False
         self.fullname = f"{self.module}.{self.name}"
 
+        # source location for reporting
+        self._file, self._lineno = _get_source_location(inspect.unwrap(self._user_func))
+
+    @property
+    def doc(self) -> Optional[str]:
+        """The docstring for the test."""
+        if not self._doc_resolved:
+            doc = self._user_func.__doc__ if self._doc is None else self._doc
+            if doc is not None:
+                # cleanup docstring using `trim` function from PEP257
+                doc = inspect.cleandoc(doc)
+            self._doc = doc
+            self._doc_resolved = True
+        return self._doc
+
+    @doc.setter
+    def doc(self, value: Optional[str]) -> None:
+        self._doc = value
+        self._doc_resolved = True
+
+
+@functools.lru_cache(maxsize=None)
+def _get_source_location(func: Callable[..., Any]) -> Tuple[str, int]:
+    """Get the file and line number where *func* is defined.
+
+    Cached as it is the same for every test generated from a single function.
+    """
+    try:
+        file = inspect.getfile(func)
+    except TypeError:
+        # no source, e.g. a functools.partial object
+        return "<unknown>", 1
+    try:
+        lineno = inspect.getsourcelines(func)[1]
+    except (OSError, TypeError):
+        lineno = 1
+    return file, lineno
+
+
+class _BoundTestFunction(abc.ABC):
+    """Base for the callables used as test functions instead of a wrapper function.
+
+    A wrapper defined with :func:`functools.wraps` would be created, and have the
+    attributes of the test function copied onto it, for every test. Instead, instances
+    take the names of the test function, forward its ``__module__`` and ``__doc__``,
+    and name the coroutine returned by :meth:`_run` after the test.
+    """
+
+    __slots__ = ("__name__", "__qualname__", "__wrapped__")
+
+    def __init__(
+        self, func: Callable[..., Coroutine[Any, Any, None]], name: Optional[str] = None
+    ) -> None:
+        self.__wrapped__ = func
+        if name is None:
+            name = getattr(func, "__name__", type(self).__name__)
+            self.__qualname__ = getattr(func, "__qualname__", name)
+        else:
+            self.__qualname__ = name
+        self.__name__ = name
+
+    def __getattribute__(self, name: str) -> Any:
+        # __module__ and __doc__ can't be slots, and are set in every class body
+        if name == "__module__":
+            wrapped = object.__getattribute__(self, "__wrapped__")
+            return getattr(wrapped, "__module__", None)
+        if name == "__doc__":
+            return object.__getattribute__(self, "_get_doc")()
+        return object.__getattribute__(self, name)
+
+    def __call__(self, dut: Any) -> Coroutine[Any, Any, None]:
+        coro = self._run(dut)
+        coro.__name__ = self.__name__  # type: ignore[attr-defined]
+        coro.__qualname__ = self.__qualname__  # type: ignore[attr-defined]
+        return coro
+
+    def _get_doc(self) -> Optional[str]:
+        return getattr(self.__wrapped__, "__doc__", None)
+
+    @abc.abstractmethod
+    def _run(self, dut: Any) -> Coroutine[Any, Any, None]:
+        """Return the coroutine running the test on *dut*."""
+
+
+class _TestTimeoutFunction(_BoundTestFunction):
+    """Runs a test function, failing it if it runs longer than the test's timeout."""
+
+    __slots__ = ("_test",)
+
+    def __init__(
+        self, func: Callable[..., Coroutine[Any, Any, None]], test: Test
+    ) -> None:
+        super().__init__(func)
+        self._test = test
+
+    def _run(self, dut: Any) -> Coroutine[Any, Any, None]:
+        return _run_with_timeout(self.__wrapped__, self._test, dut)
+
+
+async def _run_with_timeout(
+    func: Callable[..., Coroutine[Any, Any, None]], test: Test, dut: Any
+) -> None:
+    # only used for tests with a timeout
+    assert test.timeout_time is not None
+    running_co: Task[None] = Task(func(dut))
+
+    try:
+        await cocotb.triggers.with_timeout(
+            running_co, test.timeout_time, test.timeout_unit
+        )
+    except SimTimeoutError:
+        running_co.kill()
+        raise
+
+
+class _TestResult(NamedTuple):
+    """Details of a finished test kept for the regression summary."""
+
+    test: str
+    passed: Optional[bool]
+    sim: float
+    real: float
+    ratio: float
+
 
 def _format_doc(docstring: Union[str, None]) -> str:
     if docstring is None:
@@ -245,7 +385,7 @@ class RegressionManager:
         self._test_start_sim_time: float
         self.log = _logger
         self._regression_start_time: float
-        self._test_results: List[Dict[str, Any]] = []
+        self._test_results: List[_TestResult] = []
         self.total_tests = 0
         """Total number of tests that will be run or skipped."""
         self.count = 0
@@ -257,12 +397,29 @@ class RegressionManager:
         self.failures = 0
         """The current number of failed tests."""
         self._tearing_down = False
-        self._test_queue: List[Test] = []
+        self._test_queue: Deque[Test] = deque()
         self._filters: List[re.Pattern[str]] = []
         self._mode = RegressionMode.REGRESSION
-        self._included: List[bool]
+        self._included: Deque[bool]
         self._sim_failure: Union[SimFailure, None] = None
 
+        # Setup log highlighting
+        ###################
+
+        # resolved once since the output stream and environment do not change
+        if want_color_output():
+            self._color_test = _ANSI.COLOR_TEST
+            self._color_passed = _ANSI.COLOR_PASSED
+            self._color_failed = _ANSI.COLOR_FAILED
+            self._color_skipped = _ANSI.COLOR_SKIPPED
+            self._color_default = _ANSI.COLOR_DEFAULT
+        else:
+            self._color_test = ""
+            self._color_passed = ""
+            self._color_failed = ""
+            self._color_skipped = ""
+            self._color_default = ""
+
         # Setup XUnit
         ###################
 
@@ -372,17 +529,24 @@ class RegressionManager:
         """Start the regression."""
 
         # sort tests into stages
-        self._test_queue.sort(key=lambda test: test.stage)
+        self._test_queue = deque(sorted(self._test_queue, key=attrgetter("stage")))
 
         # mark tests for running
         if self._filters:
-            self._included = [False] * len(self._test_queue)
-            for i, test in enumerate(self._test_queue):
-                for filter in self._filters:
-                    if filter.search(test.fullname):
-                        self._included[i] = True
+            filters = self._filters
+            # Search all filters at once using a single alternation. Only done when it
+            # can't change the meaning of a filter: global inline flags would apply to
+            # the whole pattern and groups would be renumbered under backreferences.
+            if len(filters) > 1 and all(
+                f.flags == re.UNICODE and f.groups == 0 for f in filters
+            ):
+                filters = [re.compile("|".join(f"(?:{f.pattern})" for f in filters))]
+            self._included = deque(
+                any(filter.search(test.fullname) for filter in filters)
+                for test in self._test_queue
+            )
         else:
-            self._included = [True] * len(self._test_queue)
+            self._included = deque([True] * len(self._test_queue))
 
         # compute counts
         self.count = 1
@@ -406,8 +570,8 @@ class RegressionManager:
         """
 
         while self._test_queue:
-            self._test = self._test_queue.pop(0)
-            included = self._included.pop(0)
+            self._test = self._test_queue.popleft()
+            included = self._included.popleft()
 
             # if the test is not included, record and continue
             if not included:
@@ -436,9 +600,7 @@ class RegressionManager:
             self._log_test_start()
 
             # seed random number generator based on test module, name, and COCOTB_RANDOM_SEED
-            hasher = hashlib.sha1()
-            hasher.update(self._test.fullname.encode())
-            seed = cocotb._random_seed + int(hasher.hexdigest(), 16)
+            seed = cocotb._random_seed ^ zlib.crc32(self._test.fullname.encode())
             random.seed(seed)
 
             self._test_outcome = None
@@ -546,7 +708,9 @@ class RegressionManager:
                 msg="passed but we expected a failure",
             )
 
-        elif isinstance(result, (AssertionError, _Failed)) and test.expect_fail:
+        elif test.expect_fail and isinstance(
+            result, (AssertionError, _get_failed_type())
+        ):
             self._record_test_passed(
                 wall_time_s=wall_time_s,
                 sim_time_ns=sim_time_ns,
@@ -579,25 +743,19 @@ class RegressionManager:
             )
 
             if _pdb_on_exception:
+                import pdb
+
                 pdb.post_mortem(result.__traceback__)
 
         # continue test loop, assuming sim failure or not
         return self._execute()
 
-    def _get_lineno(self, test: Test) -> None:
-        try:
-            return inspect.getsourcelines(test.func)[1]
-        except OSError:
-            return 1
-
     def _log_test_start(self) -> None:
         """Called by :meth:`_execute` to log that a test is starting."""
-        hilight_start = _ANSI.COLOR_TEST if want_color_output() else ""
-        hilight_end = _ANSI.COLOR_DEFAULT if want_color_output() else ""
         self.log.info(
             "%srunning%s %s (%d/%d)%s",
-            hilight_start,
-            hilight_end,
+            self._color_test,
+            self._color_default,
             self._test.fullname,
             self.count,
             self.total_tests,
@@ -608,12 +766,11 @@ class RegressionManager:
         """Called by :meth:`_execute` when a test is excluded by filters."""
 
         # write out xunit results
-        lineno = self._get_lineno(self._test)
         self.xunit.add_testcase(
             name=self._test.name,
             classname=self._test.module,
-            file=inspect.getfile(self._test.func),
-            lineno=repr(lineno),
+            file=self._test._file,
+            lineno=repr(self._test._lineno),
             time=repr(0),
             sim_time_ns=repr(0),
             ratio_time=repr(0),
@@ -626,12 +783,10 @@ class RegressionManager:
         """Called by :meth:`_execute` when a test is skipped."""
 
         # log test results
-        hilight_start = _ANSI.COLOR_SKIPPED if want_color_output() else ""
-        hilight_end = _ANSI.COLOR_DEFAULT if want_color_output() else ""
         self.log.info(
             "%sskipping%s %s (%d/%d)%s",
-            hilight_start,
-            hilight_end,
+            self._color_skipped,
+            self._color_default,
             self._test.fullname,
             self.count,
             self.total_tests,
@@ -639,12 +794,11 @@ class RegressionManager:
         )
 
         # write out xunit results
-        lineno = self._get_lineno(self._test)
         self.xunit.add_testcase(
             name=self._test.name,
             classname=self._test.module,
-            file=inspect.getfile(self._test.func),
-            lineno=repr(lineno),
+            file=self._test._file,
+            lineno=repr(self._test._lineno),
             time=repr(0),
             sim_time_ns=repr(0),
             ratio_time=repr(0),
@@ -653,12 +807,13 @@ class RegressionManager:
 
         # save details for summary
         self._test_results.append(
-            {
-                "test": self._test.fullname,
-                "pass": None,
-                "sim": 0,
-                "real": 0,
-            }
+            _TestResult(
+                test=self._test.fullname,
+                passed=None,
+                sim=0,
+                real=0,
+                ratio=self._safe_divide(0, 0),
+            )
         )
 
         # update running passed/failed/skipped counts
@@ -669,12 +824,10 @@ class RegressionManager:
         """Called by :meth:`_execute` when a test initialization fails."""
 
         # log test results
-        hilight_start = _ANSI.COLOR_FAILED if want_color_output() else ""
-        hilight_end = _ANSI.COLOR_DEFAULT if want_color_output() else ""
         self.log.exception(
             "%sFailed to initialize%s %s! (%d/%d)%s",
-            hilight_start,
-            hilight_end,
+            self._color_failed,
+            self._color_default,
             self._test.fullname,
             self.count,
             self.total_tests,
@@ -682,12 +835,11 @@ class RegressionManager:
         )
 
         # write out xunit results
-        lineno = self._get_lineno(self._test)
         self.xunit.add_testcase(
             name=self._test.name,
             classname=self._test.module,
-            file=inspect.getfile(self._test.func),
-            lineno=repr(lineno),
+            file=self._test._file,
+            lineno=repr(self._test._lineno),
             time=repr(0),
             sim_time_ns=repr(0),
             ratio_time=repr(0),
@@ -696,13 +848,13 @@ class RegressionManager:
 
         # save details for summary
         self._test_results.append(
-            {
-                "test": self._test.fullname,
-                "pass": False,
-                "sim": 0,
-                "real": 0,
-                "ratio": self._safe_divide(0, 0),
-            }
+            _TestResult(
+                test=self._test.fullname,
+                passed=False,
+                sim=0,
+                real=0,
+                ratio=self._safe_divide(0, 0),
+            )
         )
 
         # update running passed/failed/skipped counts
@@ -716,8 +868,6 @@ class RegressionManager:
         result: Union[Exception, None],
         msg: Union[str, None],
     ) -> None:
-        start_hilight = _ANSI.COLOR_PASSED if want_color_output() else ""
-        stop_hilight = _ANSI.COLOR_DEFAULT if want_color_output() else ""
         if msg is None:
             rest = ""
         else:
@@ -729,20 +879,19 @@ class RegressionManager:
         self.log.info(
             "%s %spassed%s%s%s",
             self._test.fullname,
-            start_hilight,
-            stop_hilight,
+            self._color_passed,
+            self._color_default,
             rest,
             result_was,
         )
 
         # write out xunit results
         ratio_time = self._safe_divide(sim_time_ns, wall_time_s)
-        lineno = self._get_lineno(self._test)
         self.xunit.add_testcase(
             name=self._test.name,
             classname=self._test.module,
-            file=inspect.getfile(self._test.func),
-            lineno=repr(lineno),
+            file=self._test._file,
+            lineno=repr(self._test._lineno),
             time=repr(wall_time_s),
             sim_time_ns=repr(sim_time_ns),
             ratio_time=repr(ratio_time),
@@ -754,13 +903,13 @@ class RegressionManager:
 
         # save details for summary
         self._test_results.append(
-            {
-                "test": self._test.fullname,
-                "pass": True,
-                "sim": sim_time_ns,
-                "real": wall_time_s,
-                "ratio": ratio_time,
-            }
+            _TestResult(
+                test=self._test.fullname,
+                passed=True,
+                sim=sim_time_ns,
+                real=wall_time_s,
+                ratio=ratio_time,
+            )
         )
 
     def _record_test_failed(
@@ -770,8 +919,6 @@ class RegressionManager:
         result: Union[Exception, None],
         msg: Union[str, None],
     ) -> None:
-        start_hilight = _ANSI.COLOR_FAILED if want_color_output() else ""
-        stop_hilight = _ANSI.COLOR_DEFAULT if want_color_output() else ""
         if msg is None:
             rest = ""
         else:
@@ -779,20 +926,19 @@ class RegressionManager:
         self.log.info(
             "%s %sfailed%s%s",
             self._test.fullname,
-            start_hilight,
-            stop_hilight,
+            self._color_failed,
+            self._color_default,
             rest,
             exc_info=result,
         )
 
         # write out xunit results
         ratio_time = self._safe_divide(sim_time_ns, wall_time_s)
-        lineno = self._get_lineno(self._test)
         self.xunit.add_testcase(
             name=self._test.name,
             classname=self._test.module,
-            file=inspect.getfile(self._test.func),
-            lineno=repr(lineno),
+            file=self._test._file,
+            lineno=repr(self._test._lineno),
             time=repr(wall_time_s),
             sim_time_ns=repr(sim_time_ns),
             ratio_time=repr(ratio_time),
@@ -807,13 +953,13 @@ class RegressionManager:
 
         # save details for summary
         self._test_results.append(
-            {
-                "test": self._test.fullname,
-                "pass": False,
-                "sim": sim_time_ns,
-                "real": wall_time_s,
-                "ratio": ratio_time,
-            }
+            _TestResult(
+                test=self._test.fullname,
+                passed=False,
+                sim=sim_time_ns,
+                real=wall_time_s,
+                ratio=ratio_time,
+            )
         )
 
     def _record_sim_failure(self) -> None:
@@ -848,11 +994,8 @@ class RegressionManager:
         RATIO_FIELD = "RATIO (ns/s)"
         TOTAL_NAME = f"TESTS={self.total_tests} PASS={self.passed} FAIL={self.failures} SKIP={self.skipped}"
 
-        TEST_FIELD_LEN = max(
-            len(TEST_FIELD),
-            len(TOTAL_NAME),
-            len(max([x["test"] for x in self._test_results], key=len)),
-        )
+        TEST_NAME_LEN = max(len(x.test) for x in self._test_results)
+        TEST_FIELD_LEN = max(len(TEST_FIELD), len(TOTAL_NAME), TEST_NAME_LEN)
         RESULT_FIELD_LEN = len(RESULT_FIELD)
         SIM_FIELD_LEN = len(SIM_FIELD)
         REAL_FIELD_LEN = len(REAL_FIELD)
@@ -887,74 +1030,64 @@ class RegressionManager:
 
         LINE_SEP = "*" * LINE_LEN + "\n"
 
-        summary = ""
-        summary += LINE_SEP
-        summary += "** {a:<{a_len}}  {b:^{b_len}}  {c:>{c_len}}  {d:>{d_len}}  {e:>{e_len}} **\n".format(
-            **header_dict
+        summary = [LINE_SEP]
+        summary.append(
+            "** {a:<{a_len}}  {b:^{b_len}}  {c:>{c_len}}  {d:>{d_len}}  {e:>{e_len}} **\n".format(
+                **header_dict
+            )
+        )
+        summary.append(LINE_SEP)
+
+        # bake the field widths into the row format so each row only substitutes values
+        # fields: test, highlight start, status, highlight end, sim time, real time, ratio
+        test_line = (
+            f"** {{0:<{TEST_FIELD_LEN}}}  {{1}}{{2:^{RESULT_FIELD_LEN}}}{{3}}"
+            f"  {{4:>{SIM_FIELD_LEN - 1}.2f}}   {{5:>{REAL_FIELD_LEN - 1}.2f}}"
+            f"   {{6:>{RATIO_FIELD_LEN - 1}}}  **\n"
         )
-        summary += LINE_SEP
 
-        test_line = "** {a:<{a_len}}  {start}{b:^{b_len}}{end}  {c:>{c_len}.2f}   {d:>{d_len}.2f}   {e:>{e_len}}  **\n"
+        # highlight and status text keyed by the result's ``passed`` value
+        result_styles = {
+            None: (self._color_skipped, "SKIP"),
+            True: (self._color_passed, "PASS"),
+            False: (self._color_failed, "FAIL"),
+        }
         for result in self._test_results:
-            hilite = ""
-            lolite = ""
-
-            if result["pass"] is None:
+            hilite, pass_fail_str = result_styles[result.passed]
+            if result.passed is None:
                 ratio = "-.--"
-                pass_fail_str = "SKIP"
-                if want_color_output():
-                    hilite = _ANSI.COLOR_SKIPPED
-                    lolite = _ANSI.COLOR_DEFAULT
-            elif result["pass"]:
-                ratio = format(result["ratio"], "0.2f")
-                pass_fail_str = "PASS"
-                if want_color_output():
-                    hilite = _ANSI.COLOR_PASSED
-                    lolite = _ANSI.COLOR_DEFAULT
             else:
-                ratio = format(result["ratio"], "0.2f")
-                pass_fail_str = "FAIL"
-                if want_color_output():
-                    hilite = _ANSI.COLOR_FAILED
-                    lolite = _ANSI.COLOR_DEFAULT
-
-            test_dict = dict(
-                a=result["test"],
-                b=pass_fail_str,
-                c=result["sim"],
-                d=result["real"],
-                e=ratio,
-                a_len=TEST_FIELD_LEN,
-                b_len=RESULT_FIELD_LEN,
-                c_len=SIM_FIELD_LEN - 1,
-                d_len=REAL_FIELD_LEN - 1,
-                e_len=RATIO_FIELD_LEN - 1,
-                start=hilite,
-                end=lolite,
+                ratio = format(result.ratio, "0.2f")
+
+            summary.append(
+                test_line.format(
+                    result.test,
+                    hilite,
+                    pass_fail_str,
+                    self._color_default,
+                    result.sim,
+                    result.real,
+                    ratio,
+                )
             )
 
-            summary += test_line.format(**test_dict)
-
-        summary += LINE_SEP
-
-        summary += test_line.format(
-            a=TOTAL_NAME,
-            b="",
-            c=sim_time_ns,
-            d=real_time,
-            e=format(ratio_time, "0.2f"),
-            a_len=TEST_FIELD_LEN,
-            b_len=RESULT_FIELD_LEN,
-            c_len=SIM_FIELD_LEN - 1,
-            d_len=REAL_FIELD_LEN - 1,
-            e_len=RATIO_FIELD_LEN - 1,
-            start="",
-            end="",
+        summary.append(LINE_SEP)
+
+        summary.append(
+            test_line.format(
+                TOTAL_NAME,
+                "",
+                "",
+                "",
+                sim_time_ns,
+                real_time,
+                format(ratio_time, "0.2f"),
+            )
         )
 
-        summary += LINE_SEP
+        summary.append(LINE_SEP)
 
-        self.log.info(summary)
+        self.log.info("".join(summary))
 
     def _fail_simulation(self, msg: str) -> None:
         self._sim_failure = SimFailure(msg)
@@ -979,13 +1112,12 @@ class RegressionManager:
     @staticmethod
     def _safe_divide(a: float, b: float) -> float:
         """Used when computing time ratios to ensure no exception is raised if either time is 0."""
-        try:
+        if b != 0:
             return a / b
-        except ZeroDivisionError:
-            if a == 0:
-                return float("nan")
-            else:
-                return float("inf")
+        elif a == 0:
+            return float("nan")
+        else:
+            return float("inf")
 
 
 F = TypeVar("F", bound=Callable[..., Coroutine[Any, Any, None]])
@@ -1067,6 +1199,7 @@ class TestFactory(Generic[F]):
         self.kwargs: Dict[
             Union[str, Sequence[str]], Union[Sequence[Any], Sequence[Sequence[Any]]]
         ] = {}
+        self._warned_deprecated: Set[str] = set()
 
     @overload
     def add_option(self, name: str, optionlist: Sequence[Any]) -> None: ...
@@ -1179,74 +1312,76 @@ class TestFactory(Generic[F]):
                 .. versionadded:: 2.0
         """
 
+        # each deprecated argument is only warned about once per factory
         if prefix is not None:
-            warnings.warn(
-                "``prefix`` argument is deprecated. Use the more flexible ``name`` field instead.",
-                DeprecationWarning,
-            )
+            if "prefix" not in self._warned_deprecated:
+                self._warned_deprecated.add("prefix")
+                warnings.warn(
+                    "``prefix`` argument is deprecated. Use the more flexible ``name`` field instead.",
+                    DeprecationWarning,
+                )
         else:
             prefix = ""
 
         if postfix is not None:
-            warnings.warn(
-                "``postfix`` argument is deprecated. Use the more flexible ``name`` field instead.",
-                DeprecationWarning,
-            )
+            if "postfix" not in self._warned_deprecated:
+                self._warned_deprecated.add("postfix")
+                warnings.warn(
+                    "``postfix`` argument is deprecated. Use the more flexible ``name`` field instead.",
+                    DeprecationWarning,
+                )
         else:
             postfix = ""
 
-        glbs = inspect.stack()[stacklevel][0].f_back.f_globals
+        # only the caller's frame is needed, so avoid inspect.stack() which also reads
+        # source context for every frame on the stack
+        glbs = sys._getframe(stacklevel + 1).f_globals
+
+        self._generate_into(
+            glbs,
+            prefix=prefix,
+            postfix=postfix,
+            name=name,
+            timeout_time=timeout_time,
+            timeout_unit=timeout_unit,
+            expect_fail=expect_fail,
+            expect_error=expect_error,
+            skip=skip,
+            stage=stage,
+            _expect_sim_failure=_expect_sim_failure,
+        )
 
+    def _generate_into(
+        self,
+        glbs: Dict[str, Any],
+        *,
+        prefix: str,
+        postfix: str,
+        name: Optional[str],
+        timeout_time: Optional[float],
+        timeout_unit: str,
+        expect_fail: bool,
+        expect_error: Union[Type[Exception], Sequence[Type[Exception]]],
+        skip: bool,
+        stage: int,
+        _expect_sim_failure: bool,
+    ) -> None:
+        """Generate the tests into the module globals *glbs*."""
         if "__cocotb_tests__" not in glbs:
             glbs["__cocotb_tests__"] = []
 
         test_func_name = self.test_function.__qualname__ if name is None else name
 
-        for index, testoptions in enumerate(
-            dict(zip(self.kwargs, v)) for v in product(*self.kwargs.values())
-        ):
-            name = "%s%s%s_%03d" % (
-                prefix,
-                test_func_name,
-                postfix,
-                index + 1,
-            )
-            doc: str = "Automatically generated test\n\n"
-
-            # preprocess testoptions to split tuples
-            testoptions_split: Dict[str, Sequence[Any]] = {}
-            for optname, optvalue in testoptions.items():
-                if isinstance(optname, str):
-                    optvalue = cast(Sequence[Any], optvalue)
-                    testoptions_split[optname] = optvalue
-                else:
-                    # previously checked in add_option; ensure nothing has changed
-                    optvalue = cast(Sequence[Sequence[Any]], optvalue)
-                    assert len(optname) == len(optvalue)
-                    for n, v in zip(optname, optvalue):
-                        testoptions_split[n] = v
-
-            for optname, optvalue in testoptions_split.items():
-                if callable(optvalue):
-                    if not optvalue.__doc__:
-                        desc = "No docstring supplied"
-                    else:
-                        desc = optvalue.__doc__.split("\n")[0]
-                    doc += f"\t{optname}: {optvalue.__qualname__} ({desc})\n"
-                else:
-                    doc += f"\t{optname}: {repr(optvalue)}\n"
-
-            kwargs: Dict[str, Any] = {}
-            kwargs.update(self.kwargs_constant)
-            kwargs.update(testoptions_split)
+        # snapshot the options and constant arguments so changing them later doesn't
+        # affect these tests
+        options = _TestFactoryOptions(self.kwargs, self.kwargs_constant)
 
-            @functools.wraps(self.test_function)
-            async def _my_test(dut, kwargs: Dict[str, Any] = kwargs) -> None:
-                await self.test_function(dut, *self.args, **kwargs)
+        name_base = f"{prefix}{test_func_name}{postfix}_"
+        module = glbs["__name__"]
 
-            _my_test.__doc__ = doc
-            _my_test.__name__ = name
-            _my_test.__qualname__ = name
+        tests: List[Test] = []
+        for index in range(options.total):
+            name = name_base + format(index + 1, "03d")
 
             if name in glbs:
                 _logger.error(
@@ -1254,13 +1389,13 @@ class TestFactory(Generic[F]):
                     "This causes a previously defined testcase not to be run. "
                     "Consider using the `name`, `prefix`, or `postfix` arguments to augment the name.",
                     name,
-                    glbs["__name__"],
+                    module,
                 )
 
             test = Test(
-                func=_my_test,
+                func=_TestFactoryFunction(self, name, options, index),
                 name=name,
-                module=glbs["__name__"],
+                module=module,
                 timeout_time=timeout_time,
                 timeout_unit=timeout_unit,
                 expect_fail=expect_fail,
@@ -1270,5 +1405,117 @@ class TestFactory(Generic[F]):
                 _expect_sim_failure=_expect_sim_failure,
             )
 
-            glbs["__cocotb_tests__"].append(test)
-            glbs[test.name] = test
+            tests.append(test)
+            glbs[name] = test
+
+        glbs["__cocotb_tests__"].extend(tests)
+
+    def _make_doc(self, testoptions_split: Dict[str, Any]) -> str:
+        """Describe the option values selected for a test."""
+        doc = ["Automatically generated test\n\n"]
+        for optname, optvalue in testoptions_split.items():
+            if callable(optvalue):
+                if not optvalue.__doc__:
+                    desc = "No docstring supplied"
+                else:
+                    desc = optvalue.__doc__.partition("\n")[0]
+                doc.append(f"\t{optname}: {optvalue.__qualname__} ({desc})\n")
+            else:
+                doc.append(f"\t{optname}: {optvalue!r}\n")
+        return "".join(doc)
+
+    async def _run_test(self, dut: Any, kwargs: Dict[str, Any]) -> None:
+        await self.test_function(dut, *self.args, **kwargs)
+
+
+class _TestFactoryOptions:
+    """A snapshot of the options and constant arguments of a :class:`TestFactory`.
+
+    Each combination of option values is identified by its index in the cartesian product
+    of the options, in the order :func:`itertools.product` would produce them.
+    The values are decoded from the index on demand rather than enumerating the product.
+    """
+
+    def __init__(
+        self,
+        options: Dict[
+            Union[str, Sequence[str]], Union[Sequence[Any], Sequence[Sequence[Any]]]
+        ],
+        constants: Dict[str, Any],
+    ) -> None:
+        self.constants = dict(constants)
+
+        # Every option is stored as a group of values, a single option being a group of
+        # one, so that decoding is a straight lookup through the flatten plan.
+        values: List[Tuple[Sequence[Any], ...]] = []
+        # (name, option index, index in group) for each name given to the test function
+        plan: List[Tuple[str, int, int]] = []
+        for optname, optvalues in options.items():
+            if isinstance(optname, str):
+                values.append(tuple((optvalue,) for optvalue in optvalues))
+                plan.append((optname, len(values) - 1, 0))
+            else:
+                # previously checked in add_option; ensure nothing has changed
+                for optvalue in optvalues:
+                    assert len(optname) == len(optvalue)
+                values.append(tuple(optvalues))
+                plan.extend((n, len(values) - 1, i) for i, n in enumerate(optname))
+        self.values = tuple(values)
+
+        # mixed-radix strides, the last option varies fastest
+        strides: List[int] = []
+        total = 1
+        for optvalues in reversed(self.values):
+            strides.append(total)
+            total *= len(optvalues)
+        self.strides = tuple(reversed(strides))
+        self.total = total
+
+        # specialize the plan with everything decode needs for each name
+        self.plan: Tuple[Tuple[str, Tuple[Sequence[Any], ...], int, int, int], ...] = (
+            tuple(
+                (n, self.values[axis], self.strides[axis], len(self.values[axis]), i)
+                for n, axis, i in plan
+            )
+        )
+
+    def decode(self, index: int) -> Dict[str, Any]:
+        """Get the option values at *index*, mapped to their names with groups of options split up."""
+        return {
+            n: optvalues[index // stride % radix][i]
+            for n, optvalues, stride, radix, i in self.plan
+        }
+
+
+class _TestFactoryFunction(_BoundTestFunction):
+    """The test function of a test generated by a :class:`TestFactory`.
+
+    Factories can generate a very large number of tests, most of which are commonly
+    filtered out. So the option values and the docstring for each test are only built
+    once the test is run or described.
+    All the tests of a factory share the one wrapper, :meth:`TestFactory._run_test`.
+    """
+
+    __slots__ = ("_factory", "_options", "_index", "_doc")
+
+    def __init__(
+        self,
+        factory: TestFactory[Any],
+        name: str,
+        options: _TestFactoryOptions,
+        index: int,
+    ) -> None:
+        super().__init__(factory.test_function, name)
+        self._factory = factory
+        self._options = options
+        self._index = index
+        self._doc: Optional[str] = None
+
+    def _run(self, dut: Any) -> Coroutine[Any, Any, None]:
+        kwargs = {**self._options.constants, **self._options.decode(self._index)}
+        return self._factory._run_test(dut, kwargs)
+
+    def _get_doc(self) -> str:
+        if self._doc is None:
+            self._doc = self._factory._make_doc(self._options.decode(self._index))
+        return self._doc
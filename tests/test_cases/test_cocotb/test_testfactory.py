@@ -5,9 +5,13 @@
 Tests of cocotb.regression.TestFactory functionality
 """
 
+import inspect
+import warnings
 from collections.abc import Coroutine
+from itertools import product
 
 import cocotb
+from cocotb.regression import TestFactory
 
 testfactory_test_names = set()
 testfactory_test_args = set()
@@ -115,3 +119,165 @@ async def test_testfactory_no_empty_call_verify_args(dut):
         ("a1v1", "a2v2"),
         ("a1v2", "a2v2"),
     }
+
+
+testfactory_timeout_names = []
+
+
+async def run_testfactory_timeout_test(dut):
+    test = cocotb.regression_manager._test
+    coro = cocotb.regression_manager._test_task._coro
+    testfactory_timeout_names.append((test.func.__name__, coro.__qualname__))
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    tf_timeout = TestFactory(run_testfactory_timeout_test)
+tf_timeout.generate_tests(name="testfactory_timeout", timeout_time=1, timeout_unit="us")
+
+
+@cocotb.test
+async def test_testfactory_timeout_names(dut):
+    # the coroutine of a test with a timeout is named after the generated test
+    assert testfactory_timeout_names == [
+        ("testfactory_timeout_001", "testfactory_timeout_001")
+    ]
+
+
+@cocotb.test
+async def test_testfactory_timeout_func_attributes(dut):
+    # the test function of a test with a timeout forwards these from the factory's
+    func = globals()["testfactory_timeout_001"].func
+    assert func.__module__ == __name__
+    assert func.__doc__.startswith("Automatically generated test")
+
+
+parametrize_timeout_names = []
+
+
+@cocotb.test(timeout_time=1, timeout_unit="us")
+@cocotb.parametrize(arg=[1])
+async def run_parametrize_timeout_test(dut, arg):
+    """Records its test function and coroutine."""
+    test = cocotb.regression_manager._test
+    coro = cocotb.regression_manager._test_task._coro
+    parametrize_timeout_names.append(
+        (test.func.__module__, test.doc, coro.__qualname__)
+    )
+
+
+@cocotb.test
+async def test_parametrize_timeout_names(dut):
+    # the test function forwards the attributes of the decorated function, and its
+    # coroutine is named after it
+    assert parametrize_timeout_names == [
+        (
+            __name__,
+            "Records its test function and coroutine.",
+            "run_parametrize_timeout_test",
+        )
+    ]
+
+
+testfactory_options_calls = []
+
+
+async def run_testfactory_options_test(dut, arg1, arg2, arg3, gen, const):
+    name = cocotb.regression_manager._test.name
+    testfactory_options_calls.append((name, arg1, arg2, arg3, gen(), const))
+
+
+def gen_a():
+    """Generate an a.
+
+    More details.
+    """
+    return "a"
+
+
+def gen_b():
+    return "b"
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    tf_options = TestFactory(run_testfactory_options_test, const="c")
+tf_options.add_option("arg1", [1, 2])
+tf_options.add_option(("arg2", "arg3"), [("x", "y"), ("z", "w")])
+tf_options.add_option("gen", [gen_a, gen_b])
+tf_options.generate_tests()
+# replacing an option doesn't affect the tests already generated
+tf_options.add_option("arg1", [3])
+tf_options.generate_tests(name="testfactory_options_readded")
+
+
+@cocotb.test
+async def test_testfactory_options_verify_calls(dut):
+    expected = []
+    for name, arg1_values in [
+        ("run_testfactory_options_test", [1, 2]),
+        ("testfactory_options_readded", [3]),
+    ]:
+        combinations = product(arg1_values, [("x", "y"), ("z", "w")], ["a", "b"])
+        for i, (arg1, (arg2, arg3), gen) in enumerate(combinations):
+            expected.append((f"{name}_{i + 1:03d}", arg1, arg2, arg3, gen, "c"))
+    assert testfactory_options_calls == expected
+
+
+@cocotb.test
+async def test_testfactory_options_verify_doc(dut):
+    assert globals()["run_testfactory_options_test_001"].doc == (
+        "Automatically generated test\n"
+        "\n"
+        "arg1: 1\n"
+        "arg2: 'x'\n"
+        "arg3: 'y'\n"
+        "gen: gen_a (Generate an a.)"
+    )
+    assert globals()["testfactory_options_readded_004"].doc == (
+        "Automatically generated test\n"
+        "\n"
+        "arg1: 3\n"
+        "arg2: 'z'\n"
+        "arg3: 'w'\n"
+        "gen: gen_b (No docstring supplied)"
+    )
+
+
+testfactory_constants_calls = []
+
+
+async def run_testfactory_constants_test(dut, width):
+    name = cocotb.regression_manager._test.name
+    testfactory_constants_calls.append((name, width))
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    tf_constants = TestFactory(run_testfactory_constants_test, width=8)
+tf_constants.generate_tests(name="testfactory_constants_w8")
+# changing a constant argument doesn't affect the tests already generated
+tf_constants.kwargs_constant["width"] = 16
+tf_constants.generate_tests(name="testfactory_constants_w16")
+
+
+@cocotb.test
+async def test_testfactory_constants_verify_calls(dut):
+    assert testfactory_constants_calls == [
+        ("testfactory_constants_w8_001", 8),
+        ("testfactory_constants_w16_001", 16),
+    ]
+
+
+@cocotb.test
+async def test_generated_tests_source_location(dut):
+    # generated tests and tests with a timeout are located at the decorated function
+    tests = {test.name: test for test in globals()["__cocotb_tests__"]}
+    for name, func in [
+        ("run_testfactory_options_test_001", run_testfactory_options_test),
+        ("testfactory_timeout_001", run_testfactory_timeout_test),
+        ("run_parametrize_timeout_test/arg=1", run_parametrize_timeout_test),
+    ]:
+        test = tests[name]
+        assert test._file == __file__
+        assert test._lineno == inspect.getsourcelines(func)[1]
@@ -0,0 +1,29 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+import cocotb
+
+
+@cocotb.test
+async def x_test(_):
+    assert False, "TESTCASE shouldn't match this test"
+
+
+a_test_ran = False
+
+
+@cocotb.test
+async def a_test(_):
+    global a_test_ran
+    a_test_ran = True
+
+
+@cocotb.test
+async def B_test(_):
+    assert False, "Only the first filter should ignore case"
+
+
+@cocotb.test
+async def b_test(_):
+    assert a_test_ran